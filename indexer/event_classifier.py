@@ -8,25 +8,33 @@ import threading
 
 from queue import Queue
 
-from sqlalchemy import update, select
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import sessionmaker, contains_eager
+import asyncpg
+import uvloop
+from sqlalchemy import update, select, insert, case, cast, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker, selectinload
 
 from indexer.core import redis
-from indexer.core.database import engine, Trace, Transaction, Message, Action, TraceEdge, SyncSessionMaker
+from indexer.core.database import engine, Trace, Transaction, Message, Action, TraceEdge
 from indexer.core.settings import Settings
 from indexer.events import context
 from indexer.events.blocks.utils.block_tree_serializer import block_to_action
 from indexer.events.blocks.utils.event_deserializer import deserialize_event
 from indexer.events.event_processing import process_event_async
 from indexer.events.interface_repository import EmulatedTransactionsInterfaceRepository, gather_interfaces, \
-    RedisInterfaceRepository
+    BatchedRedisInterfaceRepository
 
 async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 logger = logging.getLogger(__name__)
 settings = Settings()
 
+# worker process state, initialized once per process in init_pool
+_loop = None
+_engine = None
+_redis = None
+_session_factory = None
+
 
 async def start_processing_events_from_db(args: argparse.Namespace):
     global lt, count
@@ -38,6 +46,7 @@ async def start_processing_events_from_db(args: argparse.Namespace):
     big_traces = 0
     count = 0
     lt = 0
+    in_flight = None
     with mp.Pool(args.pool_size, initializer=init_pool) as pool:
         while True:
             async with async_session() as session:
@@ -72,15 +81,30 @@ async def start_processing_events_from_db(args: argparse.Namespace):
                 if count == 0:
                     lt = time.time()
                 count += len(ids)
+                # the next batch is collected while the previous one is still being processed by the workers
+                if in_flight is not None:
+                    in_flight.get()
+                    in_flight = None
                 if has_traces_to_process:
-                    pool.map(process_event_batch, split_into_batches(ids, args.batch_size))
+                    in_flight = pool.map_async(process_event_batch, list(split_into_batches(ids, args.batch_size)))
                 else:
                     await asyncio.sleep(0.5)
     thread.join()
 # end def
 
 def init_pool():
-    asyncio.set_event_loop(asyncio.new_event_loop())
+    global _loop, _engine, _redis, _session_factory
+    _loop = uvloop.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    _engine = create_async_engine(settings.pg_dsn,
+                                  pool_size=10,
+                                  max_overflow=5,
+                                  pool_timeout=30,
+                                  pool_pre_ping=True,
+                                  pool_recycle=1800,
+                                  echo=False)
+    _session_factory = sessionmaker(_engine, expire_on_commit=False, class_=AsyncSession)
+    _redis = redis.create_redis_client()
 
 
 def split_into_batches(data, batch_size):
@@ -91,65 +115,69 @@ def split_into_batches(data, batch_size):
 async def start_emulated_traces_processing():
     pubsub = redis.client.pubsub()
     await pubsub.subscribe(settings.emulated_traces_reddit_channel)
-    while True:
-        message = await pubsub.get_message()
-        if message is not None and message['type'] == 'message':
-            trace_id = message['data'].decode('utf-8')
-            try:
-                start = time.time()
-                res = await process_emulated_trace(trace_id)
-            except Exception as e:
-                logger.error(f"Failed to process emulated trace {trace_id}: {e}")
-        else:
-            await asyncio.sleep(1)
+    in_flight = set()
+    async for message in pubsub.listen():
+        if message['type'] != 'message':
+            continue
+        trace_id = message['data'].decode('utf-8')
+        task = asyncio.create_task(handle_emulated_trace(trace_id))
+        # keep a strong reference until the task is done
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+
+async def handle_emulated_trace(trace_id):
+    try:
+        return await process_emulated_trace(trace_id)
+    except Exception as e:
+        logger.error(f"Failed to process emulated trace {trace_id}: {e}")
 
 
 async def process_emulated_trace(trace_id):
-    trace_map = await redis.client.hgetall(trace_id)
-    trace_map = dict((str(key, encoding='utf-8'), value) for key, value in trace_map.items())
+    trace_map = {key.decode('utf-8'): value for key, value in (await redis.client.hgetall(trace_id)).items()}
     trace = deserialize_event(trace_id, trace_map)
     context.interface_repository.set(EmulatedTransactionsInterfaceRepository(trace_map))
     return await process_event_async(trace)
 
 
 def fetch_events_for_processing(queue: mp.Queue, fetch_size: int):
+    asyncio.run(fetch_events_for_processing_async(queue, fetch_size))
+
+
+async def fetch_events_for_processing_async(queue: mp.Queue, fetch_size: int):
     logger.info(f'fetching unclassified traces...')
+    # plain asyncpg connection: the poll loop only needs (trace_id, nodes_) tuples, no ORM rows
+    connection = await asyncpg.connect(settings.pg_dsn.replace('+asyncpg', ''))
+    stmt = await connection.prepare("SELECT trace_id, nodes_ FROM traces "
+                                    "WHERE state = 'complete' AND classification_state = 'unclassified' "
+                                    "ORDER BY start_lt DESC")
     while True:
-        with SyncSessionMaker() as session:
-            query = session.query(Trace.trace_id, Trace.nodes_) \
-                .filter(Trace.state == 'complete') \
-                .filter(Trace.classification_state == 'unclassified') \
-                .order_by(Trace.start_lt.desc())
-            query = query.yield_per(fetch_size)
-            for item in query:
-                queue.put(item)
-        time.sleep(1)
+        async with connection.transaction():
+            async for record in stmt.cursor(prefetch=fetch_size):
+                queue.put((record[0], record[1]))
+        await asyncio.sleep(1)
 # end def
 
 
 def process_event_batch(ids: list[str]):
-    asyncio.get_event_loop().run_until_complete(process_trace_batch_async(ids))
+    _loop.run_until_complete(process_trace_batch_async(ids))
     return None
 
 
 async def process_trace_batch_async(ids: list[str]):
-    async with async_session() as session:
+    async with _session_factory() as session:
         query = select(Trace) \
-            .join(Trace.transactions) \
-            .join(Transaction.messages, isouter=True) \
-            .join(Message.message_content, isouter=True) \
-            .options(contains_eager(Trace.transactions, Transaction.messages, Message.message_content)) \
+            .options(selectinload(Trace.transactions)
+                     .selectinload(Transaction.messages)
+                     .selectinload(Message.message_content)) \
             .filter(Trace.trace_id.in_(ids))
         result = await session.execute(query)
-        traces = result.scalars().unique().all()
+        traces = result.scalars().all()
 
         # Gather interfaces for each account
-        accounts = set()
-        for trace in traces:
-            for tx in trace.transactions:
-                accounts.add(tx.account)
+        accounts = {tx.account for trace in traces for tx in trace.transactions}
         interfaces = await gather_interfaces(accounts, session)
-        repository = RedisInterfaceRepository(redis.sync_client)
+        repository = BatchedRedisInterfaceRepository(_redis)
         await repository.put_interfaces(interfaces)
         context.interface_repository.set(repository)
         # Process traces and save actions
@@ -157,25 +185,37 @@ async def process_trace_batch_async(ids: list[str]):
         ok_traces = []
         failed_traces = []
         broken_traces = []
+        action_rows = []
         for trace_id, state, actions in results:
             if state == 'ok' or state == 'broken':
-                session.add_all(actions)
+                action_rows.extend(action_to_row(action) for action in actions)
                 if state == 'ok':
                     ok_traces.append(trace_id)
                 else:
                     broken_traces.append(trace_id)
             else:
                 failed_traces.append(trace_id)
-        stmt = update(Trace).where(Trace.trace_id.in_(ok_traces)).values(classification_state='ok')
-        await session.execute(stmt)
-        if len(broken_traces) > 0:
-            stmt = update(Trace).where(Trace.trace_id.in_(broken_traces)).values(classification_state='broken')
-            await session.execute(stmt)
-        stmt = update(Trace).where(Trace.trace_id.in_(failed_traces)).values(classification_state='failed')
-        await session.execute(stmt)
+        if len(action_rows) > 0:
+            await session.execute(insert(Action), action_rows)
+        processed_traces = ok_traces + broken_traces + failed_traces
+        if len(processed_traces) > 0:
+            stmt = update(Trace) \
+                .where(Trace.trace_id.in_(bindparam('processed_traces', expanding=True))) \
+                .values(classification_state=cast(case(
+                    (Trace.trace_id.in_(bindparam('ok_traces', expanding=True)), 'ok'),
+                    (Trace.trace_id.in_(bindparam('broken_traces', expanding=True)), 'broken'),
+                    else_='failed'), Trace.classification_state.type)) \
+                .execution_options(synchronize_session=False)
+            await session.execute(stmt, {'processed_traces': processed_traces,
+                                         'ok_traces': ok_traces,
+                                         'broken_traces': broken_traces})
         await session.commit()
 
 
+def action_to_row(action: Action) -> dict:
+    return {column.name: getattr(action, column.name) for column in Action.__table__.columns}
+
+
 async def process_trace(trace: Trace) -> tuple[str, str, list[Action]]:
     if len(trace.transactions) == 1 and trace.transactions[0].descr == 'tick_tock':
         return trace.trace_id, 'ok', []
@@ -212,6 +252,7 @@ if __name__ == '__main__':
                         type=int,
                         default=4)
     args = parser.parse_args()
+    uvloop.install()
     if settings.emulated_traces:
         logger.info("Starting processing emulated traces")
         asyncio.run(start_emulated_traces_processing())
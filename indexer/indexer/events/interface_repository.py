@@ -4,30 +4,82 @@ import abc
 import asyncio
 from collections import defaultdict
 from contextvars import ContextVar
+from typing import Any, Union
 
-import msgpack
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+import msgspec
+from sqlalchemy import select, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
 
 from indexer.core.database import JettonWallet, NFTItem, NftSale, NftAuction
 import redis
+import redis.asyncio as aioredis
+
+# Interface type tags, shared with the emulator's trace format.
+# The structs below double as the read-only values returned by repositories.
+JETTON_WALLET_INTERFACE = 0
+NFT_ITEM_INTERFACE = 2
+NFT_SALE_INTERFACE = 4
+NFT_AUCTION_INTERFACE = 5
+
+
+class JettonWalletInterface(msgspec.Struct, array_like=True, tag=JETTON_WALLET_INTERFACE):
+    balance: float
+    address: str
+    owner: str | None
+    jetton: str | None
+
+
+class NftItemInterface(msgspec.Struct, array_like=True, tag=NFT_ITEM_INTERFACE):
+    address: str
+    init: bool | None
+    index: float | None
+    collection_address: str | None
+    owner_address: str | None
+    content: Any
+
+
+class NftSaleInterface(msgspec.Struct, array_like=True, tag=NFT_SALE_INTERFACE):
+    address: str
+    is_complete: bool | None
+    created_at: int | None
+    marketplace_address: str | None
+    nft_address: str | None
+    nft_owner_address: str | None
+    full_price: float | None
+
+
+class NftAuctionInterface(msgspec.Struct, array_like=True, tag=NFT_AUCTION_INTERFACE):
+    address: str
+    nft_addr: str | None
+    nft_owner: str | None
+
+
+_interfaces_encoder = msgspec.msgpack.Encoder()
+_interfaces_decoder = msgspec.msgpack.Decoder(
+    list[Union[JettonWalletInterface, NftItemInterface, NftSaleInterface, NftAuctionInterface]])
+
+
+def _unpack_interfaces(raw_data: bytes | None) -> dict[type, msgspec.Struct] | None:
+    if raw_data is None:
+        return None
+    return {type(interface): interface for interface in _interfaces_decoder.decode(raw_data)}
 
 
 class InterfaceRepository(abc.ABC):
     @abc.abstractmethod
-    async def get_jetton_wallet(self, address: str) -> JettonWallet | None:
+    async def get_jetton_wallet(self, address: str) -> JettonWalletInterface | None:
         pass
 
     @abc.abstractmethod
-    async def get_nft_item(self, address: str) -> NFTItem | None:
+    async def get_nft_item(self, address: str) -> NftItemInterface | None:
         pass
 
     @abc.abstractmethod
-    async def get_nft_sale(self, address: str) -> NftSale | None:
+    async def get_nft_sale(self, address: str) -> NftSaleInterface | None:
         pass
 
     @abc.abstractmethod
-    async def get_nft_auction(self, address: str) -> NftAuction | None:
+    async def get_nft_auction(self, address: str) -> NftAuctionInterface | None:
         pass
 
     @abc.abstractmethod
@@ -36,58 +88,39 @@ class InterfaceRepository(abc.ABC):
 
 
 class InMemoryInterfaceRepository(InterfaceRepository):
-    def __init__(self, interface_map: dict[str, dict[str, dict]], backoff_repository: InterfaceRepository):
+    def __init__(self, interface_map: dict[str, list[msgspec.Struct]], backoff_repository: InterfaceRepository):
         self.interface_map = interface_map
         self.backoff_repository = backoff_repository
 
-    async def get_jetton_wallet(self, address: str) -> JettonWallet | None:
+    async def get_jetton_wallet(self, address: str) -> JettonWalletInterface | None:
         if address in self.interface_map:
             interfaces = self.interface_map[address]
-            for (interface_type, interface_data) in interfaces.items():
-                if interface_type == "JettonWallet":
-                    return JettonWallet(
-                        balance=interface_data["balance"],
-                        address=interface_data["address"],
-                        owner=interface_data["owner"],
-                        jetton=interface_data["jetton"],
-                    )
+            for interface in interfaces:
+                if isinstance(interface, JettonWalletInterface):
+                    return interface
         elif self.backoff_repository is not None:
             return await self.backoff_repository.get_jetton_wallet(address)
         return None
 
-    async def get_nft_item(self, address: str) -> NFTItem | None:
+    async def get_nft_item(self, address: str) -> NftItemInterface | None:
         if address in self.interface_map:
             interfaces = self.interface_map[address]
-            for (interface_type, interface_data) in interfaces.items():
-                if interface_type == "NftItem":
-                    return NFTItem(
-                        address=interface_data["address"],
-                        init=interface_data["init"],
-                        index=interface_data["index"],
-                        collection_address=interface_data["collection_address"],
-                        owner_address=interface_data["owner_address"],
-                        content=interface_data["content"],
-                    )
+            for interface in interfaces:
+                if isinstance(interface, NftItemInterface):
+                    return interface
         elif self.backoff_repository is not None:
             return await self.backoff_repository.get_nft_item(address)
         return None
 
-    async def get_nft_sale(self, address: str) -> NftSale | None:
+    async def get_nft_sale(self, address: str) -> NftSaleInterface | None:
         if address in self.interface_map:
             interfaces = self.interface_map[address]
-            for (interface_type, interface_data) in interfaces.items():
-                if interface_type == "NftSale":
-                    return NftSale(
-                        address=interface_data["address"],
-                        is_complete=interface_data["is_complete"],
-                        marketplace_address=interface_data["marketplace_address"],
-                        nft_address=interface_data["nft_address"],
-                        nft_owner_address=interface_data["nft_owner_address"],
-                        full_price=interface_data["full_price"],
-                    )
+            for interface in interfaces:
+                if isinstance(interface, NftSaleInterface):
+                    return interface
         return None
 
-    async def get_nft_auction(self, address: str) -> NftAuction | None:
+    async def get_nft_auction(self, address: str) -> NftAuctionInterface | None:
         return None
 
 
@@ -95,193 +128,278 @@ class SqlAlchemyInterfaceRepository(InterfaceRepository):
     def __init__(self, session: ContextVar[AsyncSession]):
         self.session = session
 
-    async def get_jetton_wallet(self, address: str) -> JettonWallet | None:
-        return await self.session.get().get(JettonWallet, address)
-
-    async def get_nft_item(self, address: str) -> NFTItem | None:
-        return await self.session.get().get(NFTItem, address)
-
-    async def get_nft_sale(self, address: str) -> NftSale | None:
+    async def get_jetton_wallet(self, address: str) -> JettonWalletInterface | None:
+        wallet = await self.session.get().get(JettonWallet, address)
+        if wallet is None:
+            return None
+        return JettonWalletInterface(
+            balance=wallet.balance,
+            address=wallet.address,
+            owner=wallet.owner,
+            jetton=wallet.jetton,
+        )
+
+    async def get_nft_item(self, address: str) -> NftItemInterface | None:
+        item = await self.session.get().get(NFTItem, address)
+        if item is None:
+            return None
+        return NftItemInterface(
+            address=item.address,
+            init=item.init,
+            index=item.index,
+            collection_address=item.collection_address,
+            owner_address=item.owner_address,
+            content=item.content,
+        )
+
+    async def get_nft_sale(self, address: str) -> NftSaleInterface | None:
         return None
 
-    async def get_nft_auction(self, address: str) -> NftAuction | None:
-        return await self.session.get().get(NftAuction, address)
+    async def get_nft_auction(self, address: str) -> NftAuctionInterface | None:
+        auction = await self.session.get().get(NftAuction, address)
+        if auction is None:
+            return None
+        return NftAuctionInterface(
+            address=auction.address,
+            nft_addr=auction.nft_addr,
+            nft_owner=auction.nft_owner,
+        )
 
 
 class RedisInterfaceRepository(InterfaceRepository):
-    prefix = "I_"  # Prefix for keys in Redis
+    prefix = "I3_"  # Prefix for keys in Redis, bumped whenever the payload format changes
 
     def __init__(self, connection: redis.Redis):
         self.connection = connection
+        # decoded interfaces per address, shared by all lookups made through this repository instance
+        self._cache: dict[str, asyncio.Future] = {}
 
-    async def put_interfaces(self, interfaces: dict[str, dict[str, dict]]):
-        batch_size = 5000
-        serialized_interfaces = [(RedisInterfaceRepository.prefix + address, msgpack.packb(data, use_bin_type=True))
-                                 for (address, data) in interfaces.items() if len(data.keys()) > 0]
-        for i in range(0, len(serialized_interfaces), batch_size):
-            pipe = self.connection.pipeline()
-            for (key, value) in serialized_interfaces[i:i + batch_size]:
-                pipe.set(key, value, ex=300)
-            pipe.execute()
-
-    async def get_jetton_wallet(self, address: str) -> JettonWallet | None:
-        raw_data = self.connection.get(RedisInterfaceRepository.prefix + address)
-        if raw_data is None:
-            return None
+    async def put_interfaces(self, interfaces: dict[str, list[msgspec.Struct]]):
+        pipe = self.connection.pipeline(transaction=False)
+        for (address, data) in interfaces.items():
+            pipe.set(RedisInterfaceRepository.prefix + address, _interfaces_encoder.encode(data), ex=300)
+        pipe.execute()
 
-        interfaces = msgpack.unpackb(raw_data, raw=False)
-        interface_data = next((data for (interface_type, data) in interfaces.items() if interface_type == "JettonWallet"), None)
-        if interface_data is not None:
-            return JettonWallet(
-                balance=interface_data["balance"],
-                address=interface_data["address"],
-                owner=interface_data["owner"],
-                jetton=interface_data["jetton"],
-            )
-        return None
-
-    async def get_nft_item(self, address: str) -> NFTItem | None:
+    async def _load_interfaces(self, address: str) -> dict[type, msgspec.Struct] | None:
         raw_data = self.connection.get(RedisInterfaceRepository.prefix + address)
-        if raw_data is None:
+        return _unpack_interfaces(raw_data)
+
+    async def _get_cached_interfaces(self, address: str) -> dict[type, msgspec.Struct] | None:
+        future = self._cache.get(address)
+        if future is None:
+            future = asyncio.ensure_future(self._load_interfaces(address))
+            self._cache[address] = future
+        return await future
+
+    async def get_jetton_wallet(self, address: str) -> JettonWalletInterface | None:
+        interfaces = await self._get_cached_interfaces(address)
+        if interfaces is None:
             return None
+        return interfaces.get(JettonWalletInterface)
 
-        interfaces = msgpack.unpackb(raw_data, raw=False)
-        interface_data = next((data for (interface_type, data) in interfaces.items() if interface_type == "NftItem"), None)
-        if interface_data is not None:
-            return NFTItem(
-                address=interface_data["address"],
-                init=interface_data["init"],
-                index=interface_data["index"],
-                collection_address=interface_data["collection_address"],
-                owner_address=interface_data["owner_address"],
-                content=interface_data["content"],
-            )
-        return None
-
-    async def get_nft_sale(self, address: str) -> NftSale | None:
-        raw_data = self.connection.get(RedisInterfaceRepository.prefix + address)
-        if raw_data is None:
+    async def get_nft_item(self, address: str) -> NftItemInterface | None:
+        interfaces = await self._get_cached_interfaces(address)
+        if interfaces is None:
             return None
+        return interfaces.get(NftItemInterface)
 
-        interfaces = msgpack.unpackb(raw_data, raw=False)
-        interface_data = next((data for (interface_type, data) in interfaces.items() if interface_type == "NftSale"), None)
-        if interface_data is not None:
-            return NftSale(
-                address=interface_data["address"],
-                is_complete=interface_data["is_complete"],
-                marketplace_address=interface_data["marketplace_address"],
-                nft_address=interface_data["nft_address"],
-                nft_owner_address=interface_data["nft_owner_address"],
-                full_price=interface_data["full_price"],
-            )
-        return None
+    async def get_nft_sale(self, address: str) -> NftSaleInterface | None:
+        interfaces = await self._get_cached_interfaces(address)
+        if interfaces is None:
+            return None
+        return interfaces.get(NftSaleInterface)
 
     async def get_interfaces(self, address: str) -> dict[str, dict]:
-        result = {}
-        raw_data = self.connection.get(RedisInterfaceRepository.prefix + address)
-        if raw_data is None:
+        interfaces = await self._get_cached_interfaces(address)
+        if interfaces is None:
             return {}
 
-        interfaces = msgpack.unpackb(raw_data, raw=False)
-        return interfaces
-
-    async def get_nft_auction(self, address: str) -> NftAuction | None:
-        raw_data = self.connection.get(RedisInterfaceRepository.prefix + address)
-        if raw_data is None:
+        result = {}
+        for interface in interfaces.values():
+            if isinstance(interface, JettonWalletInterface):
+                result["JettonWallet"] = {
+                    "balance": interface.balance,
+                    "address": interface.address,
+                    "owner": interface.owner,
+                    "jetton": interface.jetton,
+                }
+            elif isinstance(interface, NftItemInterface):
+                result["NftItem"] = {
+                    "address": interface.address,
+                    "init": interface.init,
+                    "index": interface.index,
+                    "collection_address": interface.collection_address,
+                    "owner_address": interface.owner_address,
+                    "content": interface.content,
+                }
+            elif isinstance(interface, NftSaleInterface):
+                result["NftSale"] = {
+                    "address": interface.address,
+                    "is_complete": interface.is_complete,
+                    "marketplace_address": interface.marketplace_address,
+                    "nft_address": interface.nft_address,
+                    "nft_owner_address": interface.nft_owner_address,
+                    "full_price": interface.full_price,
+                }
+            elif isinstance(interface, NftAuctionInterface):
+                result["NftAuction"] = {
+                    "address": interface.address,
+                    "nft_addr": interface.nft_addr,
+                    "nft_owner": interface.nft_owner,
+                }
+        return result
+
+    async def get_nft_auction(self, address: str) -> NftAuctionInterface | None:
+        interfaces = await self._get_cached_interfaces(address)
+        if interfaces is None:
             return None
-
-        interfaces = msgpack.unpackb(raw_data, raw=False)
-        interface_data = next((data for (interface_type, data) in interfaces.items() if interface_type == "NftAuction"),
-                              None)
-        if interface_data is not None:
-            return NftAuction(
-                address=interface_data["address"],
-                nft_addr=interface_data["nft_addr"],
-                nft_owner=interface_data["nft_owner"],
-            )
-        return None
+        return interfaces.get(NftAuctionInterface)
+
+
+class BatchedRedisInterfaceRepository(RedisInterfaceRepository):
+    """
+    Coalesces lookups issued by concurrently processed traces into a single MGET.
+    Requests made within one event loop iteration are flushed together.
+    """
+
+    def __init__(self, connection: aioredis.Redis):
+        super().__init__(connection)
+        self._pending: dict[str, asyncio.Future] = {}
+        self._flush_scheduled = False
+        # strong references to flush tasks until they are done
+        self._flush_tasks: set[asyncio.Task] = set()
+
+    async def put_interfaces(self, interfaces: dict[str, list[msgspec.Struct]]):
+        pipe = self.connection.pipeline(transaction=False)
+        for (address, data) in interfaces.items():
+            pipe.set(RedisInterfaceRepository.prefix + address, _interfaces_encoder.encode(data), ex=300)
+        await pipe.execute()
+
+    async def _load_interfaces(self, address: str) -> dict[type, msgspec.Struct] | None:
+        future = self._pending.get(address)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[address] = future
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                loop.call_soon(self._start_flush)
+        return await future
+
+    def _start_flush(self):
+        task = asyncio.ensure_future(self._flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self):
+        pending = self._pending
+        self._pending = {}
+        self._flush_scheduled = False
+        addresses = list(pending.keys())
+        try:
+            raw_values = await self.connection.mget([RedisInterfaceRepository.prefix + a for a in addresses])
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (address, raw_data) in zip(addresses, raw_values):
+            future = pending[address]
+            if future.done():
+                continue
+            # a payload that fails to decode only fails its own lookup
+            try:
+                future.set_result(_unpack_interfaces(raw_data))
+            except Exception as e:
+                future.set_exception(e)
 
 
 class EmulatedTransactionsInterfaceRepository(InterfaceRepository):
 
     def __init__(self, redis_hash: dict[str, bytes]):
         self.data = redis_hash
-
-    async def get_jetton_wallet(self, address: str) -> JettonWallet | None:
-        raw_data = self.data.get(address)
-        if raw_data is None:
+        self._interfaces: dict[str, dict[int, list] | None] = {}
+
+    def _get_interface_data(self, address: str, interface_type: int) -> list | None:
+        # the hash also holds packed transactions, so entries are decoded on first access and memoized
+        if address in self._interfaces:
+            interfaces = self._interfaces[address]
+        else:
+            raw_data = self.data.get(address)
+            interfaces = None
+            if raw_data is not None:
+                data = msgspec.msgpack.decode(raw_data)
+                interfaces = {type_id: interface_data for (type_id, interface_data) in data[0]}
+            self._interfaces[address] = interfaces
+        if interfaces is None:
             return None
+        return interfaces.get(interface_type)
 
-        data = msgpack.unpackb(raw_data, raw=False)
-        interfaces = data[0]
-        for (interface_type, interface_data) in interfaces:
-            if interface_type == 0:
-                return JettonWallet(
-                    balance=interface_data[0],
-                    address=interface_data[1],
-                    owner=interface_data[2],
-                    jetton=interface_data[3],
-                )
+    async def get_jetton_wallet(self, address: str) -> JettonWalletInterface | None:
+        interface_data = self._get_interface_data(address, JETTON_WALLET_INTERFACE)
+        if interface_data is not None:
+            return JettonWalletInterface(
+                balance=interface_data[0],
+                address=interface_data[1],
+                owner=interface_data[2],
+                jetton=interface_data[3],
+            )
         return None
 
-    async def get_nft_item(self, address: str) -> NFTItem | None:
-        raw_data = self.data.get(address)
-        if raw_data is None:
-            return None
-
-        data = msgpack.unpackb(raw_data, raw=False)
-        interfaces = data[0]
-        for (interface_type, interface_data) in interfaces:
-            if interface_type == 2:
-                return NFTItem(
-                    address=interface_data[0],
-                    init=interface_data[1],
-                    index=interface_data[2],
-                    collection_address=interface_data[3],
-                    owner_address=interface_data[4],
-                    content=interface_data[5],
-                )
+    async def get_nft_item(self, address: str) -> NftItemInterface | None:
+        interface_data = self._get_interface_data(address, NFT_ITEM_INTERFACE)
+        if interface_data is not None:
+            return NftItemInterface(
+                address=interface_data[0],
+                init=interface_data[1],
+                index=interface_data[2],
+                collection_address=interface_data[3],
+                owner_address=interface_data[4],
+                content=interface_data[5],
+            )
         return None
 
-    async def get_nft_sale(self, address: str) -> NftSale | None:
-        raw_data = self.data.get(address)
-        if raw_data is None:
-            return None
-
-        data = msgpack.unpackb(raw_data, raw=False)
-        interfaces = data[0]
-        for (interface_type, interface_data) in interfaces:
-            if interface_type == 4:
-                return NftSale(
-                    address=interface_data[0],
-                    is_complete=interface_data[1],
-                    marketplace_address=interface_data[3],
-                    nft_address=interface_data[4],
-                    nft_owner_address=interface_data[5],
-                    full_price=interface_data[6],
-                )
+    async def get_nft_sale(self, address: str) -> NftSaleInterface | None:
+        interface_data = self._get_interface_data(address, NFT_SALE_INTERFACE)
+        if interface_data is not None:
+            return NftSaleInterface(
+                address=interface_data[0],
+                is_complete=interface_data[1],
+                created_at=interface_data[2],
+                marketplace_address=interface_data[3],
+                nft_address=interface_data[4],
+                nft_owner_address=interface_data[5],
+                full_price=interface_data[6],
+            )
         return None
 
-    async def get_nft_auction(self, address: str) -> NftAuction | None:
-        raw_data = self.data.get(address)
-        if raw_data is None:
-            return None
-
-        data = msgpack.unpackb(raw_data, raw=False)
-        interfaces = data[0]
-        for (interface_type, interface_data) in interfaces:
-            if interface_type == 5:
-                return NftAuction(
-                    address=interface_data[0],
-                    nft_addr=interface_data[4],
-                    nft_owner=interface_data[5],
-                )
+    async def get_nft_auction(self, address: str) -> NftAuctionInterface | None:
+        interface_data = self._get_interface_data(address, NFT_AUCTION_INTERFACE)
+        if interface_data is not None:
+            return NftAuctionInterface(
+                address=interface_data[0],
+                nft_addr=interface_data[4],
+                nft_owner=interface_data[5],
+            )
         return None
 
     async def get_interfaces(self, address: str) -> dict[str, dict]:
         return {}
 
 
+# compiled once and reused for every batch regardless of how many addresses it holds
+_jetton_wallets_query = select(JettonWallet).filter(JettonWallet.address.in_(bindparam("addresses", expanding=True)))
+_nft_items_query = select(NFTItem).filter(NFTItem.address.in_(bindparam("addresses", expanding=True)))
+_nft_sales_query = select(NftSale).filter(NftSale.address.in_(bindparam("addresses", expanding=True)))
+_nft_auctions_query = select(NftAuction).filter(NftAuction.address.in_(bindparam("addresses", expanding=True)))
+
+
+async def _select_all(engine: AsyncEngine, query, params: dict) -> list:
+    async with AsyncSession(engine) as session:
+        result = await session.execute(query, params)
+        return list(result.scalars().all())
+
+
 async def _gather_data_from_db(
         accounts: set[str],
         session: AsyncSession
@@ -293,52 +411,57 @@ async def _gather_data_from_db(
     account_list = list(accounts)
     for i in range(0, len(account_list), 5000):
         batch = account_list[i:i + 5000]
-        wallets = await session.execute(select(JettonWallet).filter(JettonWallet.address.in_(batch)))
-        nft = await session.execute(select(NFTItem).filter(NFTItem.address.in_(batch)))
-        sales = await session.execute(select(NftSale).filter(NftSale.address.in_(batch)))
-        auctions = await session.execute(select(NftAuction).filter(NftAuction.address.in_(batch)))
-        jetton_wallets += list(wallets.scalars().all())
-        nft_items += list(nft.scalars().all())
-        nft_sales += list(sales.scalars().all())
-        getgems_auctions += list(auctions.scalars().all())
+        # each select runs in its own session so that queries go over separate pooled connections concurrently
+        params = {"addresses": batch}
+        (wallets, nft, sales, auctions) = await asyncio.gather(
+            _select_all(session.bind, _jetton_wallets_query, params),
+            _select_all(session.bind, _nft_items_query, params),
+            _select_all(session.bind, _nft_sales_query, params),
+            _select_all(session.bind, _nft_auctions_query, params),
+        )
+        jetton_wallets += wallets
+        nft_items += nft
+        nft_sales += sales
+        getgems_auctions += auctions
 
     return jetton_wallets, nft_items, nft_sales, getgems_auctions
 
 
-async def gather_interfaces(accounts: set[str], session: AsyncSession) -> dict[str, dict[str, dict]]:
-    result = defaultdict(dict)
+async def gather_interfaces(accounts: set[str], session: AsyncSession) -> dict[str, list[msgspec.Struct]]:
+    result = defaultdict(list)
+    if len(accounts) == 0:
+        return result
     (jetton_wallets, nft_items, nft_sales, nft_auctions) = await _gather_data_from_db(accounts, session)
-    for wallet in accounts:
-        result[wallet] = {}
     for wallet in jetton_wallets:
-        result[wallet.address]["JettonWallet"] = {
-            "balance": float(wallet.balance),
-            "address": wallet.address,
-            "owner": wallet.owner,
-            "jetton": wallet.jetton,
-        }
+        result[wallet.address].append(JettonWalletInterface(
+            balance=float(wallet.balance),
+            address=wallet.address,
+            owner=wallet.owner,
+            jetton=wallet.jetton,
+        ))
     for item in nft_items:
-        result[item.address]["NftItem"] = {
-            "address": item.address,
-            "init": item.init,
-            "index": float(item.index),
-            "collection_address": item.collection_address,
-            "owner_address": item.owner_address,
-            "content": item.content,
-        }
+        result[item.address].append(NftItemInterface(
+            address=item.address,
+            init=item.init,
+            index=float(item.index),
+            collection_address=item.collection_address,
+            owner_address=item.owner_address,
+            content=item.content,
+        ))
     for sale in nft_sales:
-        result[sale.address]["NftSale"] = {
-            "address": sale.address,
-            "is_complete": sale.is_complete,
-            "marketplace_address": sale.marketplace_address,
-            "nft_address": sale.nft_address,
-            "nft_owner_address": sale.nft_owner_address,
-            "full_price": float(sale.full_price),
-        }
+        result[sale.address].append(NftSaleInterface(
+            address=sale.address,
+            is_complete=sale.is_complete,
+            created_at=sale.created_at,
+            marketplace_address=sale.marketplace_address,
+            nft_address=sale.nft_address,
+            nft_owner_address=sale.nft_owner_address,
+            full_price=float(sale.full_price),
+        ))
     for auction in nft_auctions:
-        result[auction.address]["NftAuction"] = {
-            "address": auction.address,
-            "nft_addr": auction.nft_addr,
-            "nft_owner": auction.nft_owner
-        }
+        result[auction.address].append(NftAuctionInterface(
+            address=auction.address,
+            nft_addr=auction.nft_addr,
+            nft_owner=auction.nft_owner,
+        ))
     return result